@@ -1,11 +1,10 @@
 import argparse
 import json
 from pathlib import Path
-from .config.loader import load_automaton
+from .config.loader import load_automaton, tokenize_push
 from .core.simulator import stepwise_run, accepts
 from .render.ascii_render import render_automaton_unicode
 from .render.step_view import render_step_list
-import yaml
 import sys
 
 def interactive_build():
@@ -40,7 +39,8 @@ def interactive_build():
             print("Esperado 5 campos: from,to,read,pop,push")
             continue
         frm,to,read,pop,push = parts[:5]
-        push_list = [] if push in ('','ε') else list(push)
+        # respeita símbolos de pilha com mais de um caractere (ex.: Z0)
+        push_list = tokenize_push(push, stack_alphabet)
         transitions.append({'from':frm,'to':to,'read':read or 'ε','pop':pop or 'ε','push':push_list})
 
     spec = {
@@ -58,6 +58,7 @@ def interactive_build():
     if fname.endswith('.json'):
         Path(fname).write_text(json.dumps(spec, indent=2, ensure_ascii=False), encoding='utf-8')
     else:
+        import yaml  # só paga o import quando salva YAML
         Path(fname).write_text(yaml.safe_dump(spec, sort_keys=False, allow_unicode=True), encoding='utf-8')
     print(f"Salvo em {fname}")
     return fname
@@ -94,16 +95,73 @@ def _run_with_prompt(file_path):
             for l in trace:
                 print("  ", l)
 
+def _cmd_interactive(args):
+    fname = interactive_build()
+    if args.run:
+        _run_with_prompt(fname)
+    else:
+        print("\nAutômato salvo. Para executar rode: python -m pda_sim.cli run --file", fname)
+
+def _cmd_draw(args):
+    A = load_automaton(args.file)
+    print(render_automaton_unicode(A))
+
+def _cmd_validate(args):
+    A = load_automaton(args.file)
+    print("OK")
+
+def _cmd_run(args):
+    debug = False
+    quiet = getattr(args, 'quiet', False)
+    A = load_automaton(args.file)
+    if not quiet:
+        print(render_automaton_unicode(A))
+    inp = args.input or ""
+    if args.mode == 'step':
+        # sem TTY (entrada via pipe) o prompt é inútil; readline direto
+        # evita o custo do hook de readline do input() a cada passo
+        if sys.stdin.isatty():
+            pause = lambda: input("Pressione Enter para continuar...")
+        else:
+            pause = sys.stdin.readline
+        for frontier in stepwise_run(A, inp, mode='step'):
+            if not quiet:
+                print(render_step_list(frontier))
+            pause()
+        accepted, trace = accepts(A, inp, acceptance_mode=args.acceptance)
+        print("ACEITO" if accepted else "REJEITADO")
+        if trace:
+            print("Trace:")
+            for l in trace:
+                print("  ", l)
+    else:
+        for frontier in stepwise_run(A, inp, mode=args.mode):
+            if not quiet:
+                print(render_step_list(frontier))
+        accepted, trace = accepts(A, inp, acceptance_mode=args.acceptance)
+        print("ACEITO" if accepted else "REJEITADO")
+        if debug:
+            print("Trace:")
+            for l in trace:
+                print("  ", l)
+
+HANDLERS = {
+    'run': _cmd_run,
+    'draw': _cmd_draw,
+    'validate': _cmd_validate,
+    'interactive': _cmd_interactive,
+}
+
 def main():
     parser = argparse.ArgumentParser(description="Simulador PDA/AFD (Português BR)")
     subparsers = parser.add_subparsers(dest='cmd', required=True)
-    debug = False
 
     runp = subparsers.add_parser('run', help='Executar autômato a partir de arquivo')
     runp.add_argument('--file', required=True, help='Caminho do arquivo YAML/JSON/ASCII')
     runp.add_argument('--input', required=False, default="", help='Cadeia de entrada (ex.: aaabbb)')
     runp.add_argument('--mode', choices=['step','auto','rand'], default='step', help='Modo de simulação')
     runp.add_argument('--acceptance', choices=['final_state','empty_stack'], default='final_state', help='Modo de aceitação')
+    runp.add_argument('--quiet', action='store_true', help='Suprimir desenho e passos; imprime só o veredito')
 
     drawp = subparsers.add_parser('draw', help='Desenhar/mostrar o autômato em texto')
     drawp.add_argument('--file', required=True, help='Caminho do arquivo YAML/JSON/ASCII')
@@ -115,50 +173,7 @@ def main():
     intp.add_argument('--run', action='store_true', help='Executar o autômato imediatamente após criar')
 
     args = parser.parse_args()
-
-    if args.cmd == 'interactive':
-        fname = interactive_build()
-        if args.run:
-            _run_with_prompt(fname)
-        else:
-            print("\nAutômato salvo. Para executar rode: python -m pda_sim.cli run --file", fname)
-        return
-
-    if args.cmd == 'draw':
-        A = load_automaton(args.file)
-        print(render_automaton_unicode(A))
-        return
-
-    if args.cmd == 'validate':
-        A = load_automaton(args.file)
-        print("OK")
-        return
-
-    if args.cmd == 'run':
-        A = load_automaton(args.file)
-        print(render_automaton_unicode(A))
-        inp = args.input or ""
-        if args.mode == 'step':
-            for frontier in stepwise_run(A, inp, mode='step'):
-                print(render_step_list(frontier))
-                input("Pressione Enter para continuar...")
-            accepted, trace = accepts(A, inp, acceptance_mode=args.acceptance)
-            print("ACEITO" if accepted else "REJEITADO")
-            if trace:
-                print("Trace:")
-                for l in trace:
-                    print("  ", l)
-            return
-        else:
-            for frontier in stepwise_run(A, inp, mode=args.mode):
-                print(render_step_list(frontier))
-            accepted, trace = accepts(A, inp, acceptance_mode=args.acceptance)
-            print("ACEITO" if accepted else "REJEITADO")
-            if debug:
-                print("Trace:")
-                for l in trace:
-                    print("  ", l)
-            return
+    HANDLERS[args.cmd](args)
 
 if __name__ == '__main__':
     main()
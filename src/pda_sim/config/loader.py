@@ -1,28 +1,142 @@
+import csv
+import functools
 import json, re
+import hashlib
+import os
+import pickle
+import tempfile
+from sys import intern
 from pathlib import Path
 from typing import Dict, Any, List
-from ..core.automaton import Automaton
+from ..core.automaton import Automaton, Transition
+
+# yaml é importado sob demanda em load_from_yaml: quem carrega JSON/ASCII
+# não paga o custo de importar o PyYAML na inicialização do CLI
+_YamlLoader = None
 
 try:
-    import yaml
+    import orjson  # parser JSON mais rápido, opcional
 except Exception:
-    yaml = None
+    orjson = None
 
 class AutomatonLoadError(Exception):
     pass
 
+# versão do layout dos objetos picklados; incrementar ao mudar
+# Automaton/Transition/PDAConfig invalida caches antigos em disco
+_CACHE_FORMAT = 4
+
+def _cache_file_for(p: Path) -> Path:
+    """Caminho do cache em disco para um arquivo de autômato.
+
+    A chave inclui path absoluto + mtime + tamanho, então qualquer edição
+    do arquivo original invalida o cache automaticamente.
+    """
+    st = p.stat()
+    key = f"{_CACHE_FORMAT}|{p.resolve()}|{st.st_mtime_ns}|{st.st_size}"
+    digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+    cache_dir = Path(tempfile.gettempdir()) / "pda_sim_cache"
+    return cache_dir / f"{digest}.pkl"
+
 def load_automaton(path: str) -> Automaton:
     p = Path(path)
     if not p.exists():
         raise FileNotFoundError(path)
+    if os.environ.get('PDA_SIM_NO_CACHE'):
+        return _load_automaton_uncached(path)
+    # memo em processo: repetir o load do mesmo arquivo (não modificado)
+    # dentro de uma sessão é gratuito
+    return _load_automaton_memo(str(p), p.stat().st_mtime_ns)
+
+@functools.lru_cache(maxsize=16)
+def _load_automaton_memo(path: str, mtime_ns: int) -> Automaton:
+    return _load_automaton_uncached(path)
+
+def _load_automaton_uncached(path: str) -> Automaton:
+    p = Path(path)
+    use_cache = not os.environ.get('PDA_SIM_NO_CACHE')
+    cache_file = None
+    if use_cache:
+        cache_file = _cache_file_for(p)
+        if cache_file.exists():
+            try:
+                return pickle.loads(cache_file.read_bytes())
+            except Exception:
+                pass  # cache corrompido -> reparse
+
     suffix = p.suffix.lower()
     if suffix in ('.yaml', '.yml'):
-        return load_from_yaml(path)
-    if suffix == '.json':
-        return load_from_json(path)
-    if suffix in ('.txt', '.pda', '.ascii'):
-        return load_from_ascii(path)
-    raise AutomatonLoadError("Unsupported format")
+        A = load_from_yaml(path)
+    elif suffix == '.json':
+        A = load_from_json(path)
+    elif suffix in ('.txt', '.pda', '.ascii'):
+        A = load_from_ascii(path)
+    elif suffix == '.csv':
+        A = load_from_csv(path)
+    else:
+        A = _load_by_sniffing(p)
+
+    if use_cache:
+        try:
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp = cache_file.with_suffix('.tmp')
+            tmp.write_bytes(pickle.dumps(A))
+            os.replace(tmp, cache_file)  # escrita atômica
+        except Exception:
+            pass  # cache é apenas otimização
+    return A
+
+def _load_by_sniffing(p: Path) -> Automaton:
+    """Fallback para extensões desconhecidas: olha os primeiros bytes.
+
+    '{' -> JSON, '#META' ou linha 'from,to,...' -> CSV, 'x -> y [...]'
+    -> ASCII; YAML fica por último porque o formato ASCII de chave:valor
+    também é YAML válido.
+    """
+    with p.open('rb') as f:
+        head = f.read(4096).decode('utf-8', errors='replace')
+    stripped = head.lstrip()
+    if stripped.startswith('{'):
+        return load_from_json(str(p))
+    if stripped.startswith('#META'):
+        return load_from_csv(str(p))
+    for ln in head.splitlines():
+        ln = ln.strip()
+        if not ln or ln.startswith('#'):
+            continue
+        m = _LINE_RE.match(ln)
+        if m and m.group('trans'):
+            return load_from_ascii(str(p))
+        if ln.count(',') >= 4 and ':' not in ln:
+            return load_from_csv(str(p))
+    return load_from_yaml(str(p))
+
+def tokenize_push(push: str, stack_alphabet) -> List[str]:
+    """Divide uma string de push em símbolos da pilha.
+
+    Com símbolos de mais de um caractere (ex.: 'Z0'), quebrar por
+    caractere está errado: 'AZ0' deve virar ['A','Z0'], não
+    ['A','Z','0']. Faz casamento guloso do símbolo mais longo; se nada
+    casar, cai no caractere avulso (a validação reporta depois).
+    """
+    if not push or push == 'ε':
+        return []
+    syms = sorted((s for s in stack_alphabet if s), key=len, reverse=True)
+    if not syms or len(syms[0]) == 1:
+        return list(push)
+    tokens = []
+    i = 0
+    n = len(push)
+    while i < n:
+        for s in syms:
+            if push.startswith(s, i):
+                tokens.append(s)
+                i += len(s)
+                break
+        else:
+            tokens.append(push[i])
+            i += 1
+    return tokens
 
 def _build_from_dict(d: Dict[str,Any], source:str) -> Automaton:
     # default = pda se não informado
@@ -38,12 +152,16 @@ def _build_from_dict(d: Dict[str,Any], source:str) -> Automaton:
     if automaton_type == 'pda' and 'stack_alphabet' not in d:
         raise AutomatonLoadError(f"missing stack_alphabet in {source} for PDA")
 
-    states = set(d['states'])
-    input_alpha = set(d['input_alphabet'])
-    stack_alpha = set(d.get('stack_alphabet', []))
-    initial = d['initial_state']
-    finals = set(d['final_states'])
+    # intern nas strings: igualdade vira comparação de ponteiro nos loops
+    # quentes do simulador e o hash de dict/set fica mais barato
+    states = {intern(s) for s in d['states']}
+    input_alpha = {intern(s) for s in d['input_alphabet']}
+    stack_alpha = {intern(s) for s in d.get('stack_alphabet', [])}
+    initial = intern(d['initial_state'])
+    finals = {intern(s) for s in d['final_states']}
     initial_stack_sym = d.get('initial_stack_symbol', None)
+    if initial_stack_sym is not None:
+        initial_stack_sym = intern(initial_stack_sym)
 
     if automaton_type == "pda":
         if initial_stack_sym is not None and initial_stack_sym not in stack_alpha:
@@ -53,86 +171,168 @@ def _build_from_dict(d: Dict[str,Any], source:str) -> Automaton:
                   initial_state=initial, final_states=finals, initial_stack_symbol=initial_stack_sym,
                   automaton_type=automaton_type)
 
+    # normaliza primeiro, validando estrutura
+    normalized = []
     for idx, tr in enumerate(d['transitions'],1):
         for f in ('from','to','read','pop','push'):
             if f not in tr:
                 raise AutomatonLoadError(f"transition {idx} missing {f}")
-        frm = tr['from']; to = tr['to']; read = tr['read']; pop = tr['pop']; push = tr['push']
-        # normalize push
+        push = tr['push']
+        # normalize push (strings são tokenizadas contra o alfabeto da pilha)
         if isinstance(push, str):
-            push = [] if push in ('ε','') else list(push)
+            push = tokenize_push(push, stack_alpha)
         if not isinstance(push,(list,tuple)):
             raise AutomatonLoadError(f"push must be list at transition {idx}")
+        normalized.append((intern(tr['from']), intern(tr['to']), intern(tr['read']),
+                           intern(tr['pop']), tuple(intern(s) for s in push)))
 
-        # cheques básicos
-        if read not in ('ε','?') and read not in input_alpha:
-            if automaton_type == "pda":
-                raise AutomatonLoadError(f"read '{read}' not in input alphabet at transition {idx}")
-            else:
-                raise AutomatonLoadError(f"read '{read}' not in input alphabet at transition {idx}")
+    # cheques de pertinência em lote: uma diferença de conjuntos por coluna
+    # (operação em C) em vez de N lookups por transição em nível Python
+    reads = [t[2] for t in normalized]
+    bad_read = (set(reads) - input_alpha) - {'ε','?'}
+    if bad_read:
+        idx = next(i for i,r in enumerate(reads,1) if r in bad_read)
+        raise AutomatonLoadError(f"read '{reads[idx-1]}' not in input alphabet at transition {idx}")
 
-        if pop not in ('ε','?') and automaton_type == "pda" and pop not in stack_alpha:
-            raise AutomatonLoadError(f"pop '{pop}' not in stack alphabet at transition {idx}")
+    if automaton_type == "pda":
+        pops = [t[3] for t in normalized]
+        bad_pop = (set(pops) - stack_alpha) - {'ε','?'}
+        if bad_pop:
+            idx = next(i for i,p in enumerate(pops,1) if p in bad_pop)
+            raise AutomatonLoadError(f"pop '{pops[idx-1]}' not in stack alphabet at transition {idx}")
 
-        if automaton_type == "pda":
-            for s in push:
-                if s not in stack_alpha:
-                    raise AutomatonLoadError(f"push symbol '{s}' not in stack alphabet at transition {idx}")
+        bad_push = set().union(*(t[4] for t in normalized)) - stack_alpha if normalized else set()
+        if bad_push:
+            idx, sym = next((i,s) for i,t in enumerate(normalized,1) for s in t[4] if s in bad_push)
+            raise AutomatonLoadError(f"push symbol '{sym}' not in stack alphabet at transition {idx}")
 
-        A.add_transition(from_state=frm, to_state=to, read=read, pop=pop, push=tuple(push))
+    A.add_transitions(Transition(frm, to, read, pop, push)
+                      for frm, to, read, pop, push in normalized)
 
     return A
 
 def load_from_yaml(path: str) -> Automaton:
-    if yaml is None:
+    global _YamlLoader
+    try:
+        import yaml
+    except ImportError:
         raise AutomatonLoadError("PyYAML not installed")
-    raw = yaml.safe_load(Path(path).read_text(encoding='utf-8'))
+    if _YamlLoader is None:
+        # CSafeLoader (LibYAML) é muito mais rápido que o parser puro-Python
+        _YamlLoader = yaml.CSafeLoader if hasattr(yaml, 'CSafeLoader') else yaml.SafeLoader
+    # bytes direto para o LibYAML evitar a camada de decode do Python
+    raw = yaml.load(Path(path).read_bytes(), Loader=_YamlLoader)
     return _build_from_dict(raw, path)
 
 def load_from_json(path: str) -> Automaton:
-    raw = json.loads(Path(path).read_text(encoding='utf-8'))
+    if orjson is not None:
+        raw = orjson.loads(Path(path).read_bytes())
+    else:
+        raw = json.loads(Path(path).read_text(encoding='utf-8'))
     return _build_from_dict(raw, path)
 
+# classificação de linha em um único match: comentário/vazio, chave:valor ou transição
+_LINE_RE = re.compile(
+    r'^\s*(?:'
+    r'(?P<comment>#.*)?'
+    # texto após o ']' é tolerado (e descartado), como no matcher antigo
+    r'|(?P<trans>(?P<frm>\w+)\s*->\s*(?P<to>\w+)\s*\[(?P<params>[^\]]+)\]).*'
+    r'|(?P<kv>(?P<key>[^:]+):(?P<val>.*))'
+    r')\s*$'
+)
+
+# aliases de chave -> campo canônico do dict de spec
+_KV_FIELDS = {
+    'states': 'states', 'state': 'states', 'st': 'states',
+    'input': 'input_alphabet', 'input_alphabet': 'input_alphabet', 'alphabet': 'input_alphabet',
+    'stack': 'stack_alphabet', 'stack_alphabet': 'stack_alphabet',
+    'initial': 'initial_state', 'initial_state': 'initial_state',
+    'initial_stack': 'initial_stack_symbol', 'initial_stack_symbol': 'initial_stack_symbol',
+    'final': 'final_states', 'finals': 'final_states', 'final_states': 'final_states',
+}
+_KV_SCALAR = {'initial_state', 'initial_stack_symbol'}
+
 def load_from_ascii(path: str) -> Automaton:
-    text = Path(path).read_text(encoding='utf-8')
-    lines = [ln.strip() for ln in text.splitlines() if ln.strip() and not ln.strip().startswith('#')]
     data = {
         'states': [], 'input_alphabet': [], 'stack_alphabet': [], 'initial_state': None,
         'initial_stack_symbol': None, 'final_states': [], 'transitions': []
     }
-    trans_re = re.compile(r'^\s*(\w+)\s*->\s*(\w+)\s*\[([^\]]+)\]')
-    for ln in lines:
-        if ':' in ln and '->' not in ln:
-            k,v = [s.strip() for s in ln.split(':',1)]
-            K=k.lower()
-            vals = [x.strip() for x in v.split(',') if x.strip()]
-            if K in ('states','state','st'):
-                data['states']=vals
-            elif K in ('input','input_alphabet','alphabet'):
-                data['input_alphabet']=vals
-            elif K in ('stack','stack_alphabet'):
-                data['stack_alphabet']=vals
-            elif K in ('initial','initial_state'):
-                data['initial_state']=vals[0] if vals else None
-            elif K in ('initial_stack','initial_stack_symbol'):
-                data['initial_stack_symbol']=vals[0] if vals else None
-            elif K in ('final','finals','final_states'):
-                data['final_states']=vals
-            continue
-        m = trans_re.match(ln)
-        if m:
-            frm,to,params = m.groups()
-            pr = {'from':frm,'to':to,'read':'ε','pop':'ε','push':[]}
-            for part in [p.strip() for p in params.split(',') if p.strip()]:
-                if '=' not in part: continue
-                k,v = [s.strip() for s in part.split('=',1)]
-                if k=='read':
-                    pr['read']=v
-                elif k=='pop':
-                    pr['pop']=v
-                elif k=='push':
-                    pr['push']=[] if v in ('ε','') else list(v)
-            data['transitions'].append(pr)
-            continue
-        raise AutomatonLoadError(f"line not understood: {ln}")
+    # itera o arquivo direto, sem materializar todas as linhas em memória
+    with Path(path).open(encoding='utf-8') as f:
+        for ln in f:
+            m = _LINE_RE.match(ln)
+            if not m:
+                raise AutomatonLoadError(f"line not understood: {ln.strip()}")
+            if m.group('trans') is not None:
+                kind = 'trans'
+            elif m.group('kv') is not None:
+                kind = 'kv'
+            else:
+                continue  # linha vazia ou comentário
+            if kind == 'kv':
+                field = _KV_FIELDS.get(m.group('key').strip().lower())
+                if field is None:
+                    continue  # chave desconhecida (ex.: 'type: pda'): ignorada, como antes
+                vals = [x.strip() for x in m.group('val').split(',') if x.strip()]
+                if field in _KV_SCALAR:
+                    data[field] = vals[0] if vals else None
+                else:
+                    data[field] = vals
+                continue
+            if kind == 'trans':
+                frm, to, params = m.group('frm'), m.group('to'), m.group('params')
+                pr = {'from':frm,'to':to,'read':'ε','pop':'ε','push':[]}
+                for part in [p.strip() for p in params.split(',') if p.strip()]:
+                    if '=' not in part: continue
+                    k,v = [s.strip() for s in part.split('=',1)]
+                    if k=='read':
+                        pr['read']=v
+                    elif k=='pop':
+                        pr['pop']=v
+                    elif k=='push':
+                        pr['push']=v  # string; tokenizada em _build_from_dict
+                data['transitions'].append(pr)
+    return _build_from_dict(data, path)
+
+def load_from_csv(path: str) -> Automaton:
+    """Formato CSV: linhas '#META chave: v1,v2' seguidas de linhas
+    'from,to,read,pop,push'. A tokenização das linhas de dados fica por
+    conta do módulo csv (extensão em C), que também trata aspas.
+    """
+    data = {
+        'states': [], 'input_alphabet': [], 'stack_alphabet': [], 'initial_state': None,
+        'initial_stack_symbol': None, 'final_states': [], 'transitions': []
+    }
+    with Path(path).open(encoding='utf-8', newline='') as f:
+        def rows():
+            for ln in f:
+                stripped = ln.strip()
+                if not stripped:
+                    continue
+                if stripped.startswith('#META'):
+                    body = stripped[len('#META'):].strip()
+                    if ':' not in body:
+                        raise AutomatonLoadError(f"meta line not understood: {stripped}")
+                    k, v = [s.strip() for s in body.split(':', 1)]
+                    field = _KV_FIELDS.get(k.lower())
+                    if field is None:
+                        raise AutomatonLoadError(f"meta line not understood: {stripped}")
+                    vals = [x.strip() for x in v.split(',') if x.strip()]
+                    if field in _KV_SCALAR:
+                        data[field] = vals[0] if vals else None
+                    else:
+                        data[field] = vals
+                    continue
+                if stripped.startswith('#'):
+                    continue
+                yield ln
+        for row in csv.reader(rows()):
+            if len(row) < 5:
+                raise AutomatonLoadError(f"csv row must have 5 fields: {row}")
+            frm, to, read, pop, push = [s.strip() for s in row[:5]]
+            data['transitions'].append({
+                'from': frm, 'to': to,
+                'read': read or 'ε', 'pop': pop or 'ε',
+                'push': push,  # string; tokenizada em _build_from_dict
+            })
     return _build_from_dict(data, path)
@@ -1,7 +1,21 @@
+from collections import defaultdict
 from dataclasses import dataclass, field
+from sys import intern
 from typing import Tuple, List, Set
 
-@dataclass
+# sentinelas internadas: como Transition também interna read/pop, os
+# loops quentes podem comparar por identidade (is) em vez de por valor
+EPSILON = intern('ε')
+ANY = intern('?')
+
+# efeito líquido da transição sobre a pilha, classificado uma vez na carga
+STACK_NOP = 0       # não mexe na pilha
+STACK_PUSH = 1      # só empilha
+STACK_POP = 2       # só desempilha
+STACK_REPLACE = 3   # pop X + push começando por X: mantém X, empilha o resto
+STACK_POP_PUSH = 4  # pop e push genéricos
+
+@dataclass(slots=True)
 class Transition:
     from_state: str
     to_state: str
@@ -9,6 +23,41 @@ class Transition:
     pop: str               # symbol, 'ε' or '?'
     push: Tuple[str, ...]  # tuple empty means ε
 
+    # rótulo usado no histórico; função pura da transição, calculado uma vez
+    label: str = field(init=False, repr=False, compare=False)
+    # efeito líquido sobre a pilha (STACK_*), classificado uma vez aqui para
+    # que _apply_transition despache num int em vez de reavaliar condicionais
+    stack_op: int = field(init=False, repr=False, compare=False)
+    # para STACK_REPLACE: o que empilhar além do símbolo que seria re-empilhado
+    push_rest: Tuple[str, ...] = field(init=False, repr=False, compare=False)
+
+    def __reduce__(self):
+        # desserializa pelo construtor: o pickle padrão restaura os slots
+        # direto, sem __post_init__, e aí read/pop voltam como strings
+        # não internadas — quebrando as comparações por identidade com
+        # EPSILON/ANY nos autômatos vindos do cache em disco
+        return (Transition, (self.from_state, self.to_state, self.read, self.pop, self.push))
+
+    def __post_init__(self):
+        self.read = intern(self.read)
+        self.pop = intern(self.pop)
+        push_str = "".join(self.push) if self.push else "ε"
+        self.label = f"{self.from_state}->{self.to_state} [read:{self.read} pop:{self.pop} push:{push_str}]"
+        pops = self.pop is not EPSILON and self.pop is not ANY
+        self.push_rest = ()
+        if pops and self.push and self.push[0] == self.pop:
+            # pop X + push (X, ...): X fica onde está; só o resto é empilhado
+            self.stack_op = STACK_REPLACE
+            self.push_rest = self.push[1:]
+        elif pops and self.push:
+            self.stack_op = STACK_POP_PUSH
+        elif pops:
+            self.stack_op = STACK_POP
+        elif self.push:
+            self.stack_op = STACK_PUSH
+        else:
+            self.stack_op = STACK_NOP
+
 @dataclass
 class Automaton:
     states: Set[str]
@@ -23,5 +72,50 @@ class Automaton:
     def add_transition(self, from_state: str, to_state: str, read: str, pop: str, push: Tuple[str, ...]):
         self.transitions.append(Transition(from_state, to_state, read, pop, push))
 
+    def add_transitions(self, transitions):
+        # inserção em lote: um único extend em vez de N appends
+        self.transitions.extend(transitions)
+
     def get_transitions_from(self, state: str):
         return [t for t in self.transitions if t.from_state == state]
+
+    def _build_index(self):
+        index = defaultdict(list)
+        for t in self.transitions:
+            index[(t.from_state, t.read, t.pop)].append(t)
+        self._index = dict(index)
+        self._indexed_count = len(self.transitions)
+        # memo de get_applicable por (estado, símbolo lido, topo); o
+        # resultado só depende dessa tripla, então cada combinação é
+        # montada uma única vez por execução
+        self._applicable_cache = {}
+
+    def get_applicable(self, state: str, input_symbol, stack_top) -> List[Transition]:
+        """Transições de `state` cujos guardas de leitura/pilha podem passar.
+
+        `input_symbol`/`stack_top` são None quando entrada/pilha estão
+        vazias. Consulta no máximo 6 buckets do índice (read concreto ou
+        'ε'/'?' × pop concreto ou 'ε'/'?') em vez de varrer a lista
+        inteira. pop='?' é incluído sempre: o teste de pilha
+        vazia/símbolo inicial depende da configuração e fica no chamador.
+
+        A lista devolvida é memoizada e compartilhada entre chamadas com
+        a mesma tripla — o chamador não deve mutá-la.
+        """
+        if getattr(self, '_index', None) is None or self._indexed_count != len(self.transitions):
+            self._build_index()
+        key = (state, input_symbol, stack_top)
+        out = self._applicable_cache.get(key)
+        if out is not None:
+            return out
+        reads = ('ε', '?') if input_symbol is None else ('ε', input_symbol)
+        pops = ('ε', '?') if stack_top is None else ('ε', '?', stack_top)
+        index = self._index
+        out = []
+        for r in reads:
+            for p in pops:
+                bucket = index.get((state, r, p))
+                if bucket:
+                    out.extend(bucket)
+        self._applicable_cache[key] = out
+        return out
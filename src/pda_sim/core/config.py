@@ -1,38 +1,60 @@
 from dataclasses import dataclass, field
 from .stack import Stack
-from typing import List
+from typing import List, Optional
 
-@dataclass
+@dataclass(slots=True)
 class PDAConfig:
     state: str
-    remaining_input: List[str]
+    input_string: str      # entrada completa, compartilhada entre cópias
     stack: Stack
-    history: List[str] = field(default_factory=list)
+    pos: int = 0           # cursor na entrada; o que falta é input_string[pos:]
+    # histórico como lista encadeada imutável (entrada, resto): prefixos
+    # são compartilhados entre ramos, então fork não copia nada
+    history: Optional[tuple] = None
+
+    @property
+    def remaining_input(self) -> str:
+        return self.input_string[self.pos:]
 
     def copy(self) -> 'PDAConfig':
+        # input_string e history são imutáveis/compartilháveis: fork em
+        # O(1) no lugar de copiar listas a cada ramo
         return PDAConfig(
             state=self.state,
-            remaining_input=self.remaining_input.copy(),
+            input_string=self.input_string,
             stack=self.stack.copy(),
-            history=self.history.copy()
+            pos=self.pos,
+            history=self.history
         )
 
     def add_history(self, text: str):
-        self.history.append(text)
+        self.history = (text, self.history)
+
+    def history_list(self) -> List[str]:
+        """Materializa o histórico em lista, na ordem dos passos."""
+        out = []
+        node = self.history
+        while node is not None:
+            out.append(node[0])
+            node = node[1]
+        out.reverse()
+        return out
 
     def get_current_input_symbol(self):
-        if not self.remaining_input:
+        if self.pos >= len(self.input_string):
             return None
-        return self.remaining_input[0]
+        return self.input_string[self.pos]
 
     def consume_input(self):
-        if not self.remaining_input:
+        if self.pos >= len(self.input_string):
             raise IndexError("No input left")
-        return self.remaining_input.pop(0)
+        symbol = self.input_string[self.pos]
+        self.pos += 1
+        return symbol
 
     def is_input_empty(self):
-        return len(self.remaining_input) == 0
+        return self.pos >= len(self.input_string)
 
     def __str__(self):
-        inp = "".join(self.remaining_input) if self.remaining_input else "ε"
+        inp = self.remaining_input or "ε"
         return f"Estado: {self.state} | Entrada: {inp} | Pilha: {self.stack.as_str()}"
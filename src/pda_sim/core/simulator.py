@@ -1,9 +1,14 @@
 # src/pda_sim/core/simulator.py
+from collections import deque
 from typing import List, Optional, Tuple, Iterator, Dict
 from .config import PDAConfig
 from .stack import Stack
-from .automaton import Automaton, Transition
+from .automaton import (Automaton, Transition, EPSILON, ANY,
+                        STACK_NOP, STACK_PUSH, STACK_POP, STACK_REPLACE, STACK_POP_PUSH)
+import functools
+import heapq
 import random
+import re
 import copy
 
 DEFAULT_MAX_STEPS = 5000
@@ -11,43 +16,10 @@ DEFAULT_MAX_CONFIGS = 2000
 # quantas vezes a mesma configuração (assinatura) pode reaparecer antes de ser bloqueada
 DEFAULT_MAX_VISITS_PER_SIGNATURE = 50
 
-def _signature_of_config(cfg: PDAConfig) -> Tuple[str, Tuple[str,...], Tuple[str,...]]:
-    return (cfg.state, tuple(cfg.remaining_input), tuple(cfg.stack.items()))
-
-def _is_transition_applicable(transition: Transition, cfg: PDAConfig, automaton: Automaton) -> bool:
-    """
-    Checa se a transição é aplicável à configuração corrente (apenas leitura de guardas,
-    sem efetuar pop/push). Esta função considera corretamente 'ε' e '?'.
-    """
-    current = cfg.get_current_input_symbol()  # None if empty
-    if transition.read == 'ε':
-        read_ok = True
-    elif transition.read == '?':
-        read_ok = cfg.is_input_empty()
-    else:
-        read_ok = (current == transition.read)
-
-    if not read_ok:
-        return False
-
-    try:
-        top = cfg.stack.peek()
-    except Exception:
-        top = None
-
-    if transition.pop == 'ε':
-        pop_ok = True
-    elif transition.pop == '?':
-        if cfg.stack.is_empty():
-            pop_ok = True
-        elif automaton.initial_stack_symbol is None:
-            pop_ok = False
-        else:
-            pop_ok = (len(cfg.stack) == 1 and cfg.stack.peek() == automaton.initial_stack_symbol)
-    else:
-        pop_ok = (top == transition.pop)
-
-    return pop_ok
+def _signature_of_config(cfg: PDAConfig) -> Tuple[str, int, Stack]:
+    # a pilha é hasheável em O(1) (hash incremental nas células), então a
+    # assinatura não materializa mais uma tupla por consulta
+    return (cfg.state, cfg.pos, cfg.stack)
 
 def _apply_transition(cfg: PDAConfig, transition: Transition) -> PDAConfig:
     """
@@ -57,30 +29,60 @@ def _apply_transition(cfg: PDAConfig, transition: Transition) -> PDAConfig:
     new_cfg = cfg.copy()
     new_cfg.state = transition.to_state
 
-    if transition.read not in ('ε', '?'):
-        if new_cfg.remaining_input:
+    if transition.read is not EPSILON and transition.read is not ANY:
+        if not new_cfg.is_input_empty():
             new_cfg.consume_input()
 
-    if transition.pop not in ('ε', '?'):
+    # despacho pelo efeito líquido pré-classificado: REPLACE evita o par
+    # pop/push que se cancela (o topo já é o símbolo que voltaria à pilha)
+    op = transition.stack_op
+    if op == STACK_PUSH:
+        new_cfg.stack.push(transition.push)
+    elif op == STACK_REPLACE:
+        if transition.push_rest:
+            new_cfg.stack.push(transition.push_rest)
+    elif op != STACK_NOP:  # STACK_POP ou STACK_POP_PUSH
         try:
             new_cfg.stack.pop()
         except IndexError:
             pass
+        if op == STACK_POP_PUSH:
+            new_cfg.stack.push(transition.push)
 
-    if transition.push:
-        new_cfg.stack.push(tuple(transition.push))
-
-    push_str = "".join(transition.push) if transition.push else "ε"
-    new_cfg.add_history(f"{transition.from_state}->{transition.to_state} [read:{transition.read} pop:{transition.pop} push:{push_str}]")
+    new_cfg.add_history(transition.label)
     return new_cfg
 
+# compilada uma vez no import; re.match recompilaria (ou consultaria o
+# cache do módulo re) a cada estado ordenado
+_NAT_RE = re.compile(r'([^\d]*)(\d+)$')
+
+# nomes de estado mudam raramente: memoizar a chave evita refazer o
+# match quando o mesmo estado é ordenado de novo (ex.: renderizações)
+@functools.lru_cache(maxsize=None)
 def _natural_sort_key_state(s: str):
     # Ordenação natural: q0, q1, q10 ...
-    m = re.match(r'([^\d]*)(\d+)$', s)
+    m = _NAT_RE.match(s)
     if m:
         return (m.group(1), int(m.group(2)))
     return (s, 0)
 
+def _order_map(automaton: Automaton) -> Dict[str, int]:
+    """Mapa estado -> índice na ordem natural, cacheado no autômato.
+
+    Antes era recalculado (sort + dict) a cada chamada de simulate_step;
+    agora é construído uma vez e invalidado se estados forem adicionados.
+    """
+    cached = getattr(automaton, '_order_map_cache', None)
+    if cached is not None and len(cached) == len(automaton.states):
+        return cached
+    try:
+        ordered_states = sorted(automaton.states, key=_natural_sort_key_state)
+    except Exception:
+        ordered_states = sorted(automaton.states)
+    cached = {s: i for i, s in enumerate(ordered_states)}
+    automaton._order_map_cache = cached
+    return cached
+
 def _is_accepting_cfg(cfg: PDAConfig, automaton: Automaton, acceptance_mode: str) -> bool:
     """
     Critério de aceitação:
@@ -101,34 +103,51 @@ def _is_accepting_cfg(cfg: PDAConfig, automaton: Automaton, acceptance_mode: str
     else:
         raise ValueError("acceptance_mode must be 'final_state' or 'empty_stack'")
 
-def simulate_step(cfg: PDAConfig, automaton: Automaton) -> List[PDAConfig]:
+def simulate_step(cfg: PDAConfig, automaton: Automaton, order_map: Optional[Dict[str,int]] = None,
+                  shuffle: bool = True) -> List[PDAConfig]:
     """
     Retorna todas as configurações resultantes de aplicar *uma* transição
     a partir de cfg, com a restrição de que só são permitidas transições
     que vão para o mesmo estado (self-loop) ou para um estado 'à frente'
     na ordem natural dos estados.
     """
-    # cria ordering map (estado -> índice) usando ordenação natural
-    try:
-        ordered_states = sorted(list(automaton.states), key=_natural_sort_key_state)
-    except Exception:
-        ordered_states = sorted(list(automaton.states))
-    order_map = {s: i for i, s in enumerate(ordered_states)}
+    # ordering map (estado -> índice): recebido pronto do chamador ou
+    # buscado no cache do autômato — nunca reordenado aqui dentro
+    if order_map is None:
+        order_map = _order_map(automaton)
 
-    # transições do estado (embaralhadas para evitar vieses)
-    trans_list = list(automaton.get_transitions_from(cfg.state))
-    random.shuffle(trans_list)
+    # transições pré-filtradas pelo índice (embaralhadas para evitar vieses)
+    try:
+        top = cfg.stack.peek()
+    except IndexError:
+        top = None
+    trans_list = automaton.get_applicable(cfg.state, cfg.get_current_input_symbol(), top)
+    # só o modo rand precisa de ordem aleatória; na BFS o embaralhamento
+    # custava um shuffle por expansão sem mudar o resultado (dedup por
+    # assinatura), e a ordem fixa deixa a execução reprodutível.
+    # get_applicable devolve uma lista memoizada: copiar antes de mexer
+    if shuffle:
+        trans_list = list(trans_list)
+        random.shuffle(trans_list)
 
     # determina índice do estado atual; se não existir na lista, assume 0
     cur_idx = order_map.get(cfg.state, 0)
 
+    # O índice já garante os guardas de read e de pop concreto/'ε'; o
+    # único guarda que ainda depende da configuração é o de pop='?', e
+    # ele não depende da transição — decide uma vez por cfg, fora do loop
+    if top is None:
+        any_pop_ok = True
+    elif automaton.initial_stack_symbol is None:
+        any_pop_ok = False
+    else:
+        any_pop_ok = len(cfg.stack) == 1 and top == automaton.initial_stack_symbol
+
     nexts: List[PDAConfig] = []
     for t in trans_list:
         # Se o destino não estiver no mapa, permitir (fallback), mas evitar 'voltar' se possível
         to_idx = order_map.get(t.to_state, None)
-        # Regras de aceitação da transição conforme semântica (ε/?/símbolo) e top da pilha
-        # Primeiro, aplique checagens de guardas (mesma lógica anterior)
-        if not _is_transition_applicable(t, cfg, automaton):
+        if t.pop is ANY and not any_pop_ok:
             continue
 
         # Agora aplique a restrição de "forward-only":
@@ -149,22 +168,28 @@ def _prune(configs: List[PDAConfig], automaton: Automaton, max_configs:int) -> L
       3) menor tamanho de pilha (preferir desempilhar)
     Limita a `max_configs`.
     """
+    final_states = automaton.final_states
     def score(c:PDAConfig):
-        in_final = 1 if c.state in automaton.final_states else 0
-        rem = -len(c.remaining_input)
+        in_final = 1 if c.state in final_states else 0
+        rem = c.pos - len(c.input_string)
         stack_sz = -len(c.stack)
         return (in_final, rem, stack_sz)
-    sortedc = sorted(configs, key=score, reverse=True)
-    return sortedc[:max_configs]
+    # O(n log k) para ficar com os k melhores, sem ordenar tudo
+    return heapq.nlargest(max_configs, configs, key=score)
 
 def stepwise_run(automaton: Automaton, input_string: str, mode: str = "step",
                  max_steps: Optional[int]=None, max_configs:int=DEFAULT_MAX_CONFIGS,
                  max_visits_per_signature:int=DEFAULT_MAX_VISITS_PER_SIGNATURE,
-                 acceptance_mode: str = "final_state") -> Iterator[List[PDAConfig]]:
+                 acceptance_mode: str = "final_state",
+                 enable_pruning: bool = True) -> Iterator[List[PDAConfig]]:
     """
     Iterador que gera a frontier (lista de configurações) a cada passo.
     Para 'final_state' agora aceitamos imediatamente se ANY configuração estiver em estado final,
     independentemente de ainda haver fita restante.
+
+    As listas produzidas são instantâneos somente-leitura: o gerador não
+    as muta depois do yield, e em troca não paga uma cópia defensiva por
+    passo. Quem precisar alterar deve copiar do seu lado.
     """
     if max_steps is None:
         max_steps = DEFAULT_MAX_STEPS
@@ -174,85 +199,158 @@ def stepwise_run(automaton: Automaton, input_string: str, mode: str = "step",
     if automaton.initial_stack_symbol:
         initial_stack.push((automaton.initial_stack_symbol,))
 
-    initial_cfg = PDAConfig(state=automaton.initial_state, remaining_input=list(input_string), stack=initial_stack, history=["start"])
+    initial_cfg = PDAConfig(state=automaton.initial_state, input_string=input_string, stack=initial_stack, history=("start", None))
     frontier = [initial_cfg]
 
-    # visit-counts para assinaturas
-    visit_counts: Dict[Tuple[str,Tuple[str,...],Tuple[str,...]], int] = {}
+    # visit-counts para assinaturas (modo rand); BFS usa o set 'seen'
+    visit_counts: Dict[Tuple[str,int,Tuple[str,...]], int] = {}
     visit_counts[_signature_of_config(initial_cfg)] = 1
+    seen = {_signature_of_config(initial_cfg)}
 
     # se a configuração inicial já é aceitante, yield e pare
     if any(_is_accepting_cfg(c, automaton, acceptance_mode) for c in frontier):
-        yield frontier.copy()
+        yield frontier
         return
 
     step = 0
-    yield frontier.copy()
-
-    while frontier:
-        step += 1
-        if step > max_steps:
-            raise RuntimeError("max steps exceeded")
-
-        if mode == "rand":
-            # random-walk: escolha aleatória de configuração e de transição aplicável
-            cfg = random.choice(frontier)
-            nexts = simulate_step(cfg, automaton)
+    yield frontier
+
+    # construído uma vez por execução; os loops abaixo só fazem lookup
+    order_map = _order_map(automaton)
+
+    if mode == "rand":
+        while frontier:
+            step += 1
+            if step > max_steps:
+                raise RuntimeError("max steps exceeded")
+
+            # random-walk: a frontier aqui é sempre unitária (começa com a
+            # config inicial e vira [chosen] a cada passo), então remover a
+            # config corrente é só esvaziar a lista — nada de filtrar
+            cfg = frontier[0]
+            nexts = simulate_step(cfg, automaton, order_map, shuffle=True)
             if not nexts:
-                # dead-end -> remove essa config da frontier
-                frontier = [c for c in frontier if c is not cfg]
-                # checar aceitação
-                if any(_is_accepting_cfg(c, automaton, acceptance_mode) for c in frontier):
-                    yield frontier.copy()
-                    return
-                yield frontier.copy()
+                # dead-end -> caminho esgotado
+                frontier = []
+                yield frontier
                 continue
             chosen = random.choice(nexts)
             sig = _signature_of_config(chosen)
             cnt = visit_counts.get(sig, 0)
             if cnt >= max_visits_per_signature:
-                frontier = [c for c in frontier if c is not cfg]
-                if any(_is_accepting_cfg(c, automaton, acceptance_mode) for c in frontier):
-                    yield frontier.copy()
-                    return
-                yield frontier.copy()
+                frontier = []
+                yield frontier
                 continue
             visit_counts[sig] = cnt + 1
             frontier = [chosen]
             # se a nova configuração for aceitante, yield e pare
             if any(_is_accepting_cfg(c, automaton, acceptance_mode) for c in frontier):
-                yield frontier.copy()
+                yield frontier
                 return
-            yield frontier.copy()
-            continue
+            yield frontier
+        return
 
-        # modos 'auto' e 'step' (expansão em largura)
-        next_frontier: List[PDAConfig] = []
-        for cfg in frontier:
-            nexts = simulate_step(cfg, automaton)
-            for ncfg in nexts:
+    # modos 'auto' e 'step' (expansão em largura)
+    # dois deques trocados por passo: nada de realocar uma lista nova por
+    # nível; só o yield materializa uma lista (os deques são reusados,
+    # então aqui o snapshot é inevitável)
+    cur = deque(frontier)
+    nxt: deque = deque()
+    finals = automaton.final_states
+    final_mode = acceptance_mode == "final_state"
+    while cur:
+        step += 1
+        if step > max_steps:
+            raise RuntimeError("max steps exceeded")
+
+        # na BFS, reexplorar uma assinatura já vista é trabalho redundante
+        # (mesma subárvore); o conjunto 'seen' corta a explosão na origem.
+        # A aceitação é decidida aqui mesmo, ao inserir cada filho, em vez
+        # de uma segunda varredura da frontier por passo
+        accepting_found = False
+        for cfg in cur:
+            for ncfg in simulate_step(cfg, automaton, order_map, shuffle=False):
                 sig = _signature_of_config(ncfg)
-                cnt = visit_counts.get(sig, 0)
-                if cnt >= max_visits_per_signature:
+                if sig in seen:
                     continue
-                visit_counts[sig] = cnt + 1
-                next_frontier.append(ncfg)
-
-        # prune se estourou configs
-        if len(next_frontier) > max_configs:
-            next_frontier = _prune(next_frontier, automaton, max_configs)
-
-        # se qualquer configuração de next_frontier for aceitante -> yield e pare
-        if any(_is_accepting_cfg(c, automaton, acceptance_mode) for c in next_frontier):
-            frontier = next_frontier
-            yield frontier.copy()
+                seen.add(sig)
+                nxt.append(ncfg)
+                if not accepting_found:
+                    if final_mode:
+                        accepting_found = ncfg.state in finals
+                    else:
+                        accepting_found = _is_accepting_cfg(ncfg, automaton, acceptance_mode)
+
+        # prune só quando a frontier está de fato explodindo: estourou o
+        # limite E cresceu mais de 2x num passo; fora disso o custo do
+        # score/heap não compensa (ela tende a colapsar sozinha)
+        if enable_pruning and len(nxt) > max_configs and len(nxt) > 2 * len(cur):
+            nxt = deque(_prune(nxt, automaton, max_configs))
+            if accepting_found:
+                # o prune pode ter descartado a configuração aceitante
+                accepting_found = any(_is_accepting_cfg(c, automaton, acceptance_mode) for c in nxt)
+
+        cur, nxt = nxt, cur
+        nxt.clear()
+
+        # se qualquer configuração nova for aceitante -> yield e pare
+        if accepting_found:
+            yield list(cur)
             return
 
-        frontier = next_frontier
-        if frontier:
-            yield frontier.copy()
+        if cur:
+            yield list(cur)
 
 
+def _is_true_dfa(automaton: Automaton) -> bool:
+    """Detecta um AFD de verdade: sem pilha, sem ε/'?', no máximo uma
+    transição por (estado, símbolo). O loader aceita 'dfa' com
+    ε-transições, e esses seguem pela BFS normal."""
+    if automaton.automaton_type != "dfa":
+        return False
+    if automaton.initial_stack_symbol:
+        return False
+    seen_keys = set()
+    for t in automaton.transitions:
+        if t.read is EPSILON or t.read is ANY:
+            return False
+        if t.pop is not EPSILON or t.push:
+            return False
+        key = (t.from_state, t.read)
+        if key in seen_keys:
+            return False
+        seen_keys.add(key)
+    return True
+
+def _dfa_accepts(automaton: Automaton, input_string: str,
+                 acceptance_mode: str) -> Tuple[bool, Optional[List[str]]]:
+    """Caminho rápido determinístico: avança (estado, posição) in place,
+    sem frontier, sem cópias de configuração e sem pilha (sempre vazia).
+    Replica a semântica da BFS, inclusive a restrição forward-only e a
+    aceitação imediata em estado final."""
+    order_map = _order_map(automaton)
+    index = {(t.from_state, t.read): t for t in automaton.transitions}
+
+    state = automaton.initial_state
+    finals = automaton.final_states
+    history = ["start"]
+    if acceptance_mode == "final_state" and state in finals:
+        return True, history
+    for ch in input_string:
+        t = index.get((state, ch))
+        if t is None:
+            return False, None
+        to_idx = order_map.get(t.to_state)
+        if to_idx is not None and to_idx < order_map.get(state, 0):
+            return False, None
+        state = t.to_state
+        history.append(t.label)
+        if acceptance_mode == "final_state" and state in finals:
+            return True, history
+    if acceptance_mode == "empty_stack":
+        return True, history  # entrada consumida e pilha (inexistente) vazia
+    return False, None
+
 def accepts(automaton: Automaton, input_string: str, max_steps: Optional[int]=None,
             acceptance_mode: str="final_state", max_visits_per_signature:int=DEFAULT_MAX_VISITS_PER_SIGNATURE) -> Tuple[bool, Optional[List[str]]]:
     """
@@ -262,6 +360,9 @@ def accepts(automaton: Automaton, input_string: str, max_steps: Optional[int]=No
     if acceptance_mode not in ("final_state","empty_stack"):
         raise ValueError("acceptance_mode must be 'final_state' or 'empty_stack'")
 
+    if _is_true_dfa(automaton):
+        return _dfa_accepts(automaton, input_string, acceptance_mode)
+
     if max_steps is None:
         max_steps = DEFAULT_MAX_STEPS
 
@@ -269,32 +370,32 @@ def accepts(automaton: Automaton, input_string: str, max_steps: Optional[int]=No
     if automaton.initial_stack_symbol:
         initial_stack.push((automaton.initial_stack_symbol,))
 
-    initial_cfg = PDAConfig(state=automaton.initial_state, remaining_input=list(input_string), stack=initial_stack, history=["start"])
+    initial_cfg = PDAConfig(state=automaton.initial_state, input_string=input_string, stack=initial_stack, history=("start", None))
     frontier = [initial_cfg]
-    visit_counts: Dict[Tuple[str,Tuple[str,...],Tuple[str,...]], int] = { _signature_of_config(initial_cfg): 1 }
+    seen = {_signature_of_config(initial_cfg)}
+
+    if _is_accepting_cfg(initial_cfg, automaton, acceptance_mode):
+        return True, initial_cfg.history_list()
 
     step = 0
+    order_map = _order_map(automaton)
     while frontier:
         step += 1
         if step > max_steps:
             raise RuntimeError("max steps exceeded")
 
-        for cfg in frontier:
-            if _is_accepting_cfg(cfg, automaton, acceptance_mode):
-                return True, cfg.history
-
-        next_frontier=[]
-        for cfg in frontier:
-            next_frontier.extend(simulate_step(cfg, automaton))
-
+        # uma única varredura: expande e já testa aceitação dos filhos,
+        # em vez de percorrer a frontier duas vezes por passo
         filtered = []
-        for ncfg in next_frontier:
-            sig = _signature_of_config(ncfg)
-            cnt = visit_counts.get(sig, 0)
-            if cnt >= max_visits_per_signature:
-                continue
-            visit_counts[sig] = cnt + 1
-            filtered.append(ncfg)
+        for cfg in frontier:
+            for ncfg in simulate_step(cfg, automaton, order_map, shuffle=False):
+                sig = _signature_of_config(ncfg)
+                if sig in seen:
+                    continue
+                seen.add(sig)
+                if _is_accepting_cfg(ncfg, automaton, acceptance_mode):
+                    return True, ncfg.history_list()
+                filtered.append(ncfg)
         frontier = filtered
 
     return False, None
@@ -1,38 +1,85 @@
-from typing import List, Tuple
+from typing import List, Optional, Tuple
+
+# hash da cadeia vazia, usado como base do hash incremental das células
+_EMPTY_HASH = hash(())
 
 class Stack:
+    """Pilha persistente sobre células imutáveis (cons).
+
+    Cada célula é uma tupla (símbolo, resto, tamanho, hash): tamanho e
+    hash são acumulados na criação, então len(), __hash__ e copy() são
+    O(1). Como as células nunca mudam, copy() compartilha a cadeia
+    inteira em vez de duplicar uma lista a cada ramo da simulação —
+    push/pop só religam o ponteiro de topo deste objeto, sem afetar as
+    cópias.
+    """
+    __slots__ = ('_head',)
+
     def __init__(self, initial: List[str] | None = None):
-        self._items: List[str] = list(initial) if initial else []
+        self._head: Optional[tuple] = None
+        if initial:
+            self.push(initial)
 
     def push(self, seq: Tuple[str, ...] | List[str]) -> None:
         # push sequence so that last element becomes top
+        head = self._head
         for symbol in seq:
-            self._items.append(symbol)
+            if head is None:
+                head = (symbol, None, 1, hash((symbol, _EMPTY_HASH)))
+            else:
+                head = (symbol, head, head[2] + 1, hash((symbol, head[3])))
+        self._head = head
 
     def pop(self) -> str:
-        if not self._items:
+        head = self._head
+        if head is None:
             raise IndexError("pop from empty stack")
-        return self._items.pop()
+        self._head = head[1]
+        return head[0]
 
     def peek(self) -> str:
-        if not self._items:
+        if self._head is None:
             raise IndexError("peek from empty stack")
-        return self._items[-1]
+        return self._head[0]
 
     def as_str(self) -> str:
-        if not self._items:
+        if self._head is None:
             return "ε"
         # represent from bottom .. top
-        return ",".join(self._items)
+        return ",".join(self.items())
 
     def is_empty(self) -> bool:
-        return len(self._items) == 0
+        return self._head is None
 
     def __len__(self):
-        return len(self._items)
+        return self._head[2] if self._head is not None else 0
 
     def copy(self) -> 'Stack':
-        return Stack(initial=self._items.copy())
+        new = Stack.__new__(Stack)
+        new._head = self._head
+        return new
+
+    def items(self) -> List[str]:
+        # materializa fundo..topo; usado só em renderização/depuração
+        out = []
+        node = self._head
+        while node is not None:
+            out.append(node[0])
+            node = node[1]
+        out.reverse()
+        return out
+
+    def __hash__(self):
+        return self._head[3] if self._head is not None else _EMPTY_HASH
 
-    def items(self):
-        return self._items
+    def __eq__(self, other):
+        if not isinstance(other, Stack):
+            return NotImplemented
+        a, b = self._head, other._head
+        while a is not None and b is not None:
+            if a is b:  # cadeias compartilhadas: sufixo comum, iguais
+                return True
+            if a[2] != b[2] or a[3] != b[3] or a[0] != b[0]:
+                return False
+            a, b = a[1], b[1]
+        return a is None and b is None
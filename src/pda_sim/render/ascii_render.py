@@ -1,8 +1,11 @@
 from collections import defaultdict
 import re
 
+# compilada uma vez no import, em vez de reanalisar o padrão por estado
+_NAT_RE = re.compile(r'([^\d]*)(\d+)$')
+
 def _natural_sort_key(s: str):
-    m = re.match(r'([^\d]*)(\d+)$', s)
+    m = _NAT_RE.match(s)
     if m:
         return (m.group(1), int(m.group(2)))
     return (s, 0)
@@ -40,61 +43,97 @@ def _make_circle_lines(label: str, double: bool=False):
         line4 = " " + "`" + "-"*(inner) + "'" + " "
     return [line0, line1, line2, line3, line4]
 
-def _ensure_canvas_size(canvas, r, c):
-    # garante que canvas tem pelo menos r+1 linhas e c+1 colunas
-    if r < 0 or c < 0:
-        return False
-    # linhas
-    while r >= len(canvas):
-        # estende com mesma largura das linhas existentes ou largura 0
-        width = len(canvas[0]) if canvas else 0
-        canvas.append(list(" " * width))
-    # colunas
-    if not canvas:
-        canvas.append(list(" " * (c+1)))
-    if c >= len(canvas[0]):
-        neww = c + 1
-        for i in range(len(canvas)):
-            canvas[i].extend([" "] * (neww - len(canvas[i])))
-    return True
-
-def _cell_empty(canvas, r, c):
-    if r < 0 or c < 0:
-        return False
-    if r >= len(canvas) or c >= len(canvas[r]):
-        return True
-    return canvas[r][c] == " "
+class _Canvas:
+    """Grade de caracteres num único buffer plano (linha-major).
 
-def _write_char_safe(canvas, r, c, ch):
+    Substitui a lista de listas: indexar é r*cols + c, as escritas de
+    texto viram uma atribuição de fatia só, e o buffer é pré-alocado no
+    tamanho calculado do desenho — redimensionar (raro, só quando um
+    rótulo escapa da borda) realoca uma vez em vez de estender linha a
+    linha. Células guardam str de 1 caractere porque o desenho usa
+    Unicode (─, ▶, ε...), que não cabe num bytearray.
     """
-    Escreve ch em (r,c) apenas se a célula atual for ' ' (espaço).
-    Se a célula estiver ocupada, retorna False e não sobrescreve.
-    Garante expansão do canvas.
-    """
-    _ensure_canvas_size(canvas, r, c)
-    if canvas[r][c] == " ":
-        canvas[r][c] = ch
+    __slots__ = ('buf', 'rows', 'cols')
+
+    def __init__(self, rows: int, cols: int):
+        self.rows = rows
+        self.cols = cols
+        self.buf = [" "] * (rows * cols)
+
+    def ensure(self, r, c):
+        # garante que o buffer cobre a célula (r,c)
+        if r < 0 or c < 0:
+            return False
+        if r < self.rows and c < self.cols:
+            return True
+        nrows = max(self.rows, r + 1)
+        ncols = max(self.cols, c + 1)
+        nbuf = [" "] * (nrows * ncols)
+        old, oc = self.buf, self.cols
+        for i in range(self.rows):
+            nbuf[i * ncols:i * ncols + oc] = old[i * oc:(i + 1) * oc]
+        self.buf, self.rows, self.cols = nbuf, nrows, ncols
         return True
-    return False
 
-def _write_str_safe(canvas, r, c, text):
-    """
-    Tenta escrever text em (r,c) respeitando células ocupadas.
-    Se encontrar ocupação, falha e retorna False (não faz escrita parcial).
-    Garante expansão.
-    """
-    if r < 0:
+    def write_char_safe(self, r, c, ch):
+        """Escreve ch em (r,c) apenas se a célula atual for ' ' (espaço).
+        Se a célula estiver ocupada, retorna False e não sobrescreve."""
+        self.ensure(r, c)
+        i = r * self.cols + c
+        if self.buf[i] == " ":
+            self.buf[i] = ch
+            return True
         return False
-    # garanta espaço
-    _ensure_canvas_size(canvas, r, c + len(text) - 1)
-    # checa se todas células estão vazias
-    for i, ch in enumerate(text):
-        if canvas[r][c + i] != " ":
+
+    def write_str_safe(self, r, c, text):
+        """Tenta escrever text em (r,c) respeitando células ocupadas.
+        Se encontrar ocupação, falha e retorna False (não faz escrita parcial)."""
+        if r < 0 or c < 0:
+            return False
+        self.ensure(r, c + len(text) - 1)
+        i = r * self.cols + c
+        span = self.buf[i:i + len(text)]
+        if span.count(" ") != len(span):
             return False
-    # escreve
-    for i, ch in enumerate(text):
-        canvas[r][c + i] = ch
-    return True
+        self.buf[i:i + len(text)] = text
+        return True
+
+    def find_free_col(self, r, preferred_col, length, max_shift):
+        """Procura a coluna mais próxima de preferred_col (direto, depois
+        desvios 1-esq, 1-dir, 2-esq, ...) onde cabe um trecho livre de
+        `length` células na linha r. Materializa a linha uma vez e testa
+        cada candidato com uma comparação de fatia, em vez de fatiar o
+        buffer do canvas a cada sondagem. Células além da borda contam
+        como livres (o canvas cresce na escrita). Retorna a coluna ou None.
+        """
+        if r < self.rows:
+            base = r * self.cols
+            row = "".join(self.buf[base:base + self.cols])
+        else:
+            row = ""  # linha ainda não existe: tudo livre
+        def free(c):
+            seg = row[c:c + length]
+            return seg == " " * len(seg)
+        if preferred_col >= 0 and free(preferred_col):
+            return preferred_col
+        for shift in range(1, max_shift + 1):
+            for direction in (-1, 1):
+                c = preferred_col + direction * shift
+                if c < 0:
+                    continue
+                if free(c):
+                    return c
+        return None
+
+    def write_str_force(self, r, c, text):
+        # escrita incondicional (arte base e fallbacks de rótulo)
+        self.ensure(r, c + len(text) - 1)
+        i = r * self.cols + c
+        self.buf[i:i + len(text)] = text
+
+    def lines(self):
+        buf, cols = self.buf, self.cols
+        return ["".join(buf[i * cols:(i + 1) * cols]).rstrip() for i in range(self.rows)]
 
 def _place_label_freely(canvas, start_row, preferred_col, text, min_row=0, max_row=None):
     """
@@ -104,21 +143,14 @@ def _place_label_freely(canvas, start_row, preferred_col, text, min_row=0, max_r
     Esta função tenta preservar já-desenhado.
     """
     if max_row is None:
-        max_row = len(canvas) - 1
+        max_row = canvas.rows - 1
     #tentativa vertical: start_row, start_row-1, ..., min_row
     for r in range(start_row, min_row - 1, -1):
-        # tentativa direta
-        if _write_str_safe(canvas, r, preferred_col, text):
-            return (r, preferred_col)
-        # tente deslocar esquerda / direita dentro de uma faixa
-        max_shift = 10
-        for shift in range(1, max_shift+1):
-            for dir in (-1, 1):
-                c = preferred_col + dir * shift
-                if c < 0:
-                    continue
-                if _write_str_safe(canvas, r, c, text):
-                    return (r, c)
+        # a sondagem horizontal (direta + desvios até 10) fica no canvas,
+        # que varre a linha materializada uma única vez
+        c = canvas.find_free_col(r, preferred_col, len(text), max_shift=10)
+        if c is not None and canvas.write_str_safe(r, c, text):
+            return (r, c)
     return None
 
 def render_automaton_unicode(automaton):
@@ -152,22 +184,20 @@ def render_automaton_unicode(automaton):
     total_width = max(cur - spacing, 0) if states else 0
     total_height = 5  # altura do bloco do círculo
 
-    # canvas com linhas extras acima para loops/labels
+    # canvas com linhas extras acima para loops/labels; pré-alocado no
+    # tamanho final calculado, então o caminho comum não redimensiona
     extra_top = 6
     canvas_height = extra_top + total_height + 2
-    canvas = [list(" " * max(total_width, 40)) for _ in range(canvas_height)]
+    canvas = _Canvas(canvas_height, max(total_width, 40))
 
     top_row = extra_top  # onde começa o bloco do círculo
 
-    # desenha blocos dos estados
+    # desenha blocos dos estados (arte base: escrita direta, linha inteira)
     for s in states:
         off = offsets[s]
         lines = state_art[s]
         for r, ln in enumerate(lines):
-            for c, ch in enumerate(ln):
-                _ensure_canvas_size(canvas, top_row + r, off + c)
-                # escreve direto (é a arte base)
-                canvas[top_row + r][off + c] = ch
+            canvas.write_str_force(top_row + r, off, ln)
 
     # centros e boundaries dos blocos (colunas)
     centers = {}
@@ -182,50 +212,52 @@ def render_automaton_unicode(automaton):
         centers[s] = (center_col, center_row)
         boundaries[s] = (left, right)
 
-    # agrupa transições por (from,to)
+    # agrupa transições por (from,to); uma única passada já separa
+    # self-loops de setas e materializa o rótulo juntado de cada grupo,
+    # em vez de reiterar groups.items() e refazer o join por desenho
     groups = defaultdict(list)
     for t in automaton.transitions:
         push_str = "".join(t.push) if t.push else "ε"
         label = f"({t.read},{t.pop},{push_str})"
         groups[(t.from_state, t.to_state)].append(label)
+    loop_groups = []
+    arrow_groups = []
+    for (frm, to), labels in groups.items():
+        joined = " | ".join(labels)
+        if frm == to:
+            loop_groups.append((frm, joined))
+        else:
+            arrow_groups.append((frm, to, joined))
 
     # desenha transições
     # processa self-loops separadamente para reservar posições
     # primeiro desenha todos loops, depois as setas entre estados
     # isso reduz colisões entre loop-labels e arrow-labels
     # --- loops ---
-    for (frm, to), labels in groups.items():
-        if frm == to:
-            if frm not in centers:
-                continue
-            frm_col, frm_row = centers[frm]
-            lbl = " | ".join(labels)
-            loop_text = "↶" + lbl
-            # posição preferida: linha logo acima do bloco
-            preferred_row = top_row - 1
-            preferred_col = frm_col - len(loop_text)//2
-            # tenta colocar sem sobrescrever
-            placed = _place_label_freely(canvas, preferred_row, preferred_col, loop_text, min_row=0)
-            if not placed:
-                # fallback: escreve nos limites (pode sobrepor)
-                r = max(0, preferred_row)
-                c = max(0, preferred_col)
-                _ensure_canvas_size(canvas, r, c + len(loop_text) - 1)
-                for i,ch in enumerate(loop_text):
-                    # força escrita (pior caso)
-                    canvas[r][c+i] = ch
-            # marcador vertical acima do círculo (somente se célula vazia)
-            _write_char_safe(canvas, top_row - 0, frm_col, "│")
+    for frm, lbl in loop_groups:
+        if frm not in centers:
+            continue
+        frm_col, frm_row = centers[frm]
+        loop_text = "↶" + lbl
+        # posição preferida: linha logo acima do bloco
+        preferred_row = top_row - 1
+        preferred_col = frm_col - len(loop_text)//2
+        # tenta colocar sem sobrescrever
+        placed = _place_label_freely(canvas, preferred_row, preferred_col, loop_text, min_row=0)
+        if not placed:
+            # fallback: escreve nos limites (pode sobrepor)
+            r = max(0, preferred_row)
+            c = max(0, preferred_col)
+            canvas.write_str_force(r, c, loop_text)
+        # marcador vertical acima do círculo (somente se célula vazia)
+        canvas.write_char_safe(top_row - 0, frm_col, "│")
 
     # --- arrows entre diferentes estados ---
-    for (frm, to), labels in groups.items():
-        if frm == to:
-            continue
+    for frm, to, lbl in arrow_groups:
         if frm not in centers or to not in centers:
             continue
         frm_col, frm_row = centers[frm]
         to_col, to_row = centers[to]
-        lbl = " | ".join(labels)
 
         left_bound, right_bound = boundaries[frm]
         left2, right2 = boundaries[to]
@@ -251,12 +283,12 @@ def render_automaton_unicode(automaton):
 
         if arrow_dir == "right":
             for c in range(start, end):
-                _write_char_safe(canvas, frm_row, c, "─")
-            _write_char_safe(canvas, frm_row, end, "▶")
+                canvas.write_char_safe(frm_row, c, "─")
+            canvas.write_char_safe(frm_row, end, "▶")
         else:
             for c in range(start, end):
-                _write_char_safe(canvas, frm_row, c, "─")
-            _write_char_safe(canvas, frm_row, start, "◀")
+                canvas.write_char_safe(frm_row, c, "─")
+            canvas.write_char_safe(frm_row, start, "◀")
 
         mid = (start + end) // 2
         label_row_preferred = top_row - 1
@@ -270,7 +302,7 @@ def render_automaton_unicode(automaton):
                     c = label_col_preferred + dir * shift
                     if c < 0:
                         continue
-                    if _write_str_safe(canvas, label_row_preferred, c, lbl):
+                    if canvas.write_str_safe(label_row_preferred, c, lbl):
                         success = True
                         break
                 if success:
@@ -279,12 +311,10 @@ def render_automaton_unicode(automaton):
                 # fallback: sobrescrever numa linha ainda mais acima
                 r = max(0, label_row_preferred - 2)
                 c = label_col_preferred
-                _ensure_canvas_size(canvas, r, c + len(lbl) - 1)
-                for i,ch in enumerate(lbl):
-                    canvas[r][c+i] = ch
+                canvas.write_str_force(r, c, lbl)
 
     # converte canvas em linhas de string removendo espaços finais
-    lines_out = ["".join(row).rstrip() for row in canvas]
+    lines_out = canvas.lines()
     header = []
     header.append("== Autômato (desenho) ==")
     header.append(f"Estados (ordem): {', '.join(states)}")
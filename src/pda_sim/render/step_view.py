@@ -1,19 +1,48 @@
-from rich import print as rprint
-from rich.table import Table
+import functools
+
+# separador construído uma vez no import, não a cada render
+_SEP = "=" * 50
+
+# configurações idênticas reaparecem muito entre ramos da simulação;
+# a chave é barata (pos é int e a pilha persistente tem hash O(1))
+@functools.lru_cache(maxsize=4096)
+def _render_config_cached(state, input_string, pos, stack):
+    # o próprio join devolve '' para pilha vazia; o or cobre o fallback
+    stack_repr = ",".join(stack.items()) or "ε"
+    # remaining_input já é str: usar direto, sem reconstruir via join
+    inp = input_string[pos:] or "ε"
+    return f"Estado: {state}\nEntrada restante: {inp}\nPilha (fundo->topo): {stack_repr}\n"
 
 def render_config(cfg):
-    stack_items = cfg.stack.items()
-    stack_repr = "ε" if not stack_items else ",".join(stack_items)
-    inp = "".join(cfg.remaining_input) if cfg.remaining_input else "ε"
-    return f"Estado: {cfg.state}\nEntrada restante: {inp}\nPilha (fundo->topo): {stack_repr}\n"
+    return _render_config_cached(cfg.state, cfg.input_string, cfg.pos, cfg.stack)
+
+def clear_render_cache():
+    _render_config_cached.cache_clear()
 
 def render_step_list(configs):
-    out = ["="*50]
     if len(configs) == 1:
-        out.append(render_config(configs[0]))
+        return "\n".join((_SEP, render_config(configs[0]), _SEP))
+    # cabeçalho e corpo de cada config fundidos num elemento só: o join
+    # trabalha sobre metade das entradas, via list comprehension (lista
+    # pronta permite ao join pré-dimensionar o buffer de saída)
+    parts = [f"--- Config {i} ---\n{render_config(c)}" for i, c in enumerate(configs, 1)]
+    return f"{_SEP}\n" + "\n".join(parts) + f"\n{_SEP}"
+
+def render_step_list_to(stream, configs):
+    """Escreve o passo direto em `stream` (ex.: sys.stdout), sem montar
+    a string completa em memória — para traces muito longos, o pico de
+    alocação fica no tamanho de uma config, não do passo inteiro.
+    """
+    w = stream.write
+    w(_SEP)
+    w("\n")
+    if len(configs) == 1:
+        w(render_config(configs[0]))
+        w("\n")
     else:
-        for i,c in enumerate(configs,1):
-            out.append(f"--- Config {i} ---")
-            out.append(render_config(c))
-    out.append("="*50)
-    return "\n".join(out)
+        for i, c in enumerate(configs, 1):
+            w(f"--- Config {i} ---\n")
+            w(render_config(c))
+            w("\n")
+    w(_SEP)
+    w("\n")
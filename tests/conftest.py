@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# o projeto não é instalado como pacote: põe src/ no path para os testes
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
@@ -0,0 +1,44 @@
+import shutil
+import tempfile
+from pathlib import Path
+
+from pda_sim.config import loader
+from pda_sim.core.automaton import EPSILON, ANY
+from pda_sim.core.simulator import accepts
+
+EXAMPLES = Path(__file__).resolve().parent.parent / 'examples'
+
+
+def _limpa_cache_disco():
+    shutil.rmtree(Path(tempfile.gettempdir()) / 'pda_sim_cache', ignore_errors=True)
+
+
+def test_acceptance_identical_after_disk_cache_roundtrip():
+    """Regressão: o pickle padrão restaurava os slots de Transition sem
+    passar pelo __post_init__, então read/pop voltavam do cache em disco
+    como strings não internadas e as comparações por identidade com
+    EPSILON/ANY falhavam — o segundo load dava vereditos diferentes."""
+    _limpa_cache_disco()
+    path = str(EXAMPLES / 'example2.yaml')
+    frio = loader._load_automaton_uncached(path)    # escreve o pickle
+    quente = loader._load_automaton_uncached(path)  # lê o pickle
+    for entrada in ('', 'ab', 'aab', 'aabb', 'ba', 'aaabbb'):
+        for modo in ('final_state', 'empty_stack'):
+            assert accepts(frio, entrada, acceptance_mode=modo)[0] == \
+                accepts(quente, entrada, acceptance_mode=modo)[0], (entrada, modo)
+
+
+def test_sentinels_interned_after_unpickle():
+    _limpa_cache_disco()
+    path = str(EXAMPLES / 'example2.yaml')
+    loader._load_automaton_uncached(path)
+    quente = loader._load_automaton_uncached(path)
+    for t in quente.transitions:
+        if t.read == 'ε':
+            assert t.read is EPSILON
+        if t.pop == 'ε':
+            assert t.pop is EPSILON
+        if t.read == '?':
+            assert t.read is ANY
+        if t.pop == '?':
+            assert t.pop is ANY